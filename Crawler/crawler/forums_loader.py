@@ -109,7 +109,7 @@ class WoWForumsLoader(ItemLoader):
             # Log specific parsing errors and return fallback values
             import logging
             logger = logging.getLogger(__name__)
-            logger.warning(f"Error parsing HTML content: {e}")
+            logger.warning("Error parsing HTML content: %s", e)
             return {'quoted_text': [], 'comment_text': value}
 
     @staticmethod
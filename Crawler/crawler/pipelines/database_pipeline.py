@@ -30,7 +30,7 @@ class DatabasePipeline:
                 ("post_id", 1),
             ], unique=True)
         except errors.OperationFailure as e:
-            spider.logger.error(f"Error creating index: {e}")
+            spider.logger.error("Error creating index: %s", e)
 
     def close_spider(self, spider):
         self.client.close()
@@ -66,13 +66,13 @@ class DatabasePipeline:
                     # Update the document if the relevant fields have changed
                     self.collection.update_one(query, {"$set": update_data})
                     spider.logger.info(
-                        f"Updated post: Thread ID {query['thread_id']}, Post ID {query['post_id']}")
+                        "Updated post: Thread ID %s, Post ID %s", query['thread_id'], query['post_id'])
             else:
                 # Insert the document if it doesn't exist
                 self.collection.insert_one(item_dict)
                 spider.logger.info(
-                    f"DB insert SUCCESS for Thread ID {query['thread_id']}, Post ID {query['post_id']}")
+                    "DB insert SUCCESS for Thread ID %s, Post ID %s", query['thread_id'], query['post_id'])
         except Exception as e:
-            spider.logger.error(f"Error processing item: {e}")
+            spider.logger.error("Error processing item: %s", e)
 
         return item
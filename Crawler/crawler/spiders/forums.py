@@ -54,7 +54,7 @@ class WoWForumsSpider(scrapy.Spider):
             if "is_realm" in cat.get("category_metadata", {})
         }
         self.logger.info(
-            f"Server forum names identified: {self.server_forum_names}")
+            "Server forum names identified: %s", self.server_forum_names)
 
         # Now yield requests to your subforum pages (or the main page).
         # Example: the subforum URLs you provided earlier:
@@ -139,14 +139,14 @@ class WoWForumsSpider(scrapy.Spider):
             # 3) Skip if forum_name is in the deny list
             if forum_name in self.deny_forum_names:
                 self.logger.info(
-                    f"Skipping forum: {forum_name} (deny list match)")
+                    "Skipping forum: %s (deny list match)", forum_name)
                 return
 
             # Extract posts from the API response
             posts = data.get("post_stream", {}).get("posts", [])
             if not posts:
                 self.logger.info(
-                    f"No more posts found for thread {thread_id}.")
+                    "No more posts found for thread %s.", thread_id)
                 return
 
             for post in posts:
@@ -203,21 +203,22 @@ class WoWForumsSpider(scrapy.Spider):
 
             next_link = html_response.css('a[rel="next"]::attr(href)').get()
             if next_link:
-                self.logger.info(f"Following next link: {next_link}")
+                self.logger.info("Following next link: %s", next_link)
                 yield response.follow(next_link, callback=self.parse_thread_html)
 
         except (json.JSONDecodeError, KeyError) as e:
             self.logger.error(
-                f"JSON parsing error for thread {response.meta['thread_id']}: {e}"
+                "JSON parsing error for thread %s: %s", response.meta['thread_id'], e
             )
         except (AttributeError, TypeError) as e:
             self.logger.error(
-                f"Data structure error for thread {response.meta['thread_id']}: {e}"
+                "Data structure error for thread %s: %s", response.meta['thread_id'], e
             )
         except Exception as e:
             # Only catch truly unexpected exceptions and provide more detailed logging
             self.logger.error(
-                f"Unexpected error parsing thread {response.meta['thread_id']}: {type(e).__name__}: {e}",
+                "Unexpected error parsing thread %s: %s: %s",
+                response.meta['thread_id'], type(e).__name__, e,
                 exc_info=True
             )
 
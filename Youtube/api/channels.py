@@ -1,13 +1,19 @@
 # File: Youtube/api/channels.py
 
 import logging
+import time
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional, Tuple
 
-from dateutil.parser import parse
+from utils.timestamps import parse_timestamp
 
 logger = logging.getLogger(__name__)
 
+# Subscriber counts by channel ID with the monotonic time they were fetched; entries
+# expire after SUBSCRIBER_CACHE_TTL seconds.
+SUBSCRIBER_CACHE_TTL = 60 * 60
+_subscriber_cache: Dict[str, Tuple[int, float]] = {}
+
 
 class ChannelManager:
     """
@@ -35,6 +41,9 @@ class ChannelManager:
         """
         Retrieves the top N channels by subscriber count.
 
+        Subscriber counts are cached for SUBSCRIBER_CACHE_TTL seconds, so only channels
+        without a fresh count are looked up, 50 IDs per request.
+
         Args:
             youtube_client: The YouTube API client used to fetch channel statistics.
             channels (Dict): A dictionary of channel names and their information.
@@ -47,7 +56,11 @@ class ChannelManager:
         if not channel_map:
             return []
 
-        ids = list({info["channel_id"] for info in channel_map.values()})
+        now = time.monotonic()
+        ids = [
+            cid for cid in {info["channel_id"] for info in channel_map.values()}
+            if cid not in _subscriber_cache or now - _subscriber_cache[cid][1] > SUBSCRIBER_CACHE_TTL
+        ]
         id_chunks = [ids[i:i + 50] for i in range(0, len(ids), 50)]
         subs_map = {}
 
@@ -65,7 +78,8 @@ class ChannelManager:
                 return svc.channels().list(
                     part="statistics",
                     id=",".join(chunk),
-                    maxResults=len(chunk)
+                    maxResults=len(chunk),
+                    fields="items(id,statistics(subscriberCount))",
                 )
             resp, service = youtube_client.retry_request(_req)
             if resp and resp.get("items"):
@@ -76,8 +90,12 @@ class ChannelManager:
                     except (ValueError, TypeError):
                         subs_map[cid] = 0
 
+        for cid, subs in subs_map.items():
+            _subscriber_cache[cid] = (subs, now)
+
         for name, info in channel_map.items():
-            info["subscriber_count"] = subs_map.get(info["channel_id"], 0)
+            cached = _subscriber_cache.get(info["channel_id"])
+            info["subscriber_count"] = cached[0] if cached else 0
 
         sorted_channels = sorted(
             channel_map.items(),
@@ -112,6 +130,7 @@ class ChannelManager:
                 part="contentDetails",
                 id=channel_id,
                 maxResults=1,
+                fields="items(contentDetails(relatedPlaylists(uploads)))",
             )
         resp, service = youtube_client.retry_request(_chan_details)
         if not resp or not resp.get("items"):
@@ -132,14 +151,15 @@ class ChannelManager:
             return svc.playlistItems().list(
                 part="contentDetails",
                 playlistId=uploads_pl,
-                maxResults=1
+                maxResults=1,
+                fields="items(contentDetails(videoPublishedAt))",
             )
         resp, service = youtube_client.retry_request(_pl_items)
         if not resp or not resp.get("items"):
             return None
 
         last_date = resp["items"][0]["contentDetails"]["videoPublishedAt"]
-        return parse(last_date).astimezone(timezone.utc)
+        return parse_timestamp(last_date).astimezone(timezone.utc)
 
     def verify_channels(self, youtube_client, channels: Dict[str, dict], cutoff_days: int = 365) -> Dict[str, dict]:
         """
@@ -169,7 +189,7 @@ class ChannelManager:
                 Returns:
                     The API request object.
                 """
-                return svc.channels().list(part="id", id=cid, maxResults=1)
+                return svc.channels().list(part="id", id=cid, maxResults=1, fields="items(id)")
             resp, service = youtube_client.retry_request(_exists)
             exists = bool(resp and resp.get("items"))
             if not exists:
@@ -1,15 +1,23 @@
 # File: Youtube/api/comments.py
 
 import logging
-from datetime import datetime
-from typing import Dict
-
-from dateutil.parser import parse
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
 from config import CUTOFF_DATE
+from utils.timestamps import epoch_seconds, parse_timestamp
 
 logger = logging.getLogger(__name__)
 
+# CUTOFF_DATE parsed once, used as the default start date for every video.
+CUTOFF_DATETIME = parse_timestamp(CUTOFF_DATE)
+
+# Format of the timestamps returned by the YouTube Data API, e.g. "2024-05-01T12:34:56Z".
+YT_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# Shared stand-in for comments without an authorChannelId, so none is allocated per comment.
+_NO_AUTHOR: Dict = {}
+
 
 class CommentManager:
     """
@@ -30,7 +38,8 @@ class CommentManager:
         self.metadata = metadata_manager
 
     @staticmethod
-    def get_most_recent_comment_date(db, channel_id: str, video_id: str, fallback_date: str):
+    def get_most_recent_comment_date(db, channel_id: str, video_id: str,
+                                     fallback_date: Union[str, datetime]) -> datetime:
         """
         Retrieves the most recent comment date from the database or a fallback date.
 
@@ -38,13 +47,17 @@ class CommentManager:
             db: The database instance to query for the most recent comment.
             channel_id (str): The ID of the channel associated with the video.
             video_id (str): The ID of the video to retrieve the comment date for.
-            fallback_date (str): The fallback date to use if no comments are found.
+            fallback_date (Union[str, datetime]): The fallback date to use if no comments are found.
 
         Returns:
             datetime: The most recent comment date.
         """
-        row = db.get_most_recent_comment(channel_id, video_id)
-        return parse(row["updated_at"]) if row else parse(fallback_date)
+        # Only updated_at is read, so the lookup is answered from the
+        # channel_video_updated_idx index without fetching the comment itself.
+        row = db.get_most_recent_comment(channel_id, video_id, projection={"updated_at": 1, "_id": 0})
+        if row:
+            return parse_timestamp(row["updated_at"])
+        return fallback_date if isinstance(fallback_date, datetime) else parse_timestamp(fallback_date)
 
     @staticmethod
     def fetch_comments_page(youtube_client, video_id: str, page_token: str, max_results: int):
@@ -58,8 +71,9 @@ class CommentManager:
             max_results (int): The maximum number of comments to fetch per page.
 
         Returns:
-            Tuple[List[Dict], Optional[str], object]: A tuple containing the list of comments,
-            the next page token, and the YouTube service instance.
+            Tuple[Optional[List[Dict]], Optional[str], object]: A tuple containing the list of
+            comments (None if the request failed), the next page token, and the YouTube
+            service instance.
         """
 
         def _req(svc):
@@ -78,11 +92,15 @@ class CommentManager:
                 maxResults=max_results,
                 order="time",
                 pageToken=page_token,
+                fields=(
+                    "nextPageToken,items(id,snippet/topLevelComment/snippet("
+                    "authorDisplayName,authorChannelId,textDisplay,likeCount,publishedAt,updatedAt))"
+                ),
             )
 
         resp, service = youtube_client.retry_request(_req)
         if not resp:
-            return [], None, service
+            return None, None, service
         return resp.get("items", []), resp.get("nextPageToken"), service
 
     def fetch_comments_with_resume(
@@ -92,31 +110,87 @@ class CommentManager:
             channel_id: str,
             db,
             max_results: int = 100,
-            initial_fetch_date: str = CUTOFF_DATE,
+            initial_fetch_date: Union[str, datetime] = CUTOFF_DATETIME,
             ignore_progress: bool = False,
             **metadata_kwargs
     ) -> Dict:
         """
         Fetches comments for a video with resume capability, using fallback metadata if necessary.
 
+        Collects every page from `iter_comment_pages` into a single list. Progress is not
+        saved; the caller stores the returned page token with `db.save_progress` once the
+        comments are inserted.
+
         Args:
             youtube_client: The YouTube API client used to fetch comments.
             video_id (str): The ID of the video to fetch comments for.
             channel_id (str): The ID of the channel associated with the video.
             db: The database instance to store progress and retrieve metadata.
             max_results (int): The maximum number of comments to fetch per page. Defaults to 100.
-            initial_fetch_date (str): The initial date to use for fetching comments. Defaults to CUTOFF_DATE.
+            initial_fetch_date (Union[str, datetime]): The initial date to use for fetching comments.
+                Defaults to CUTOFF_DATE.
             ignore_progress (bool): Whether to ignore saved progress and start from the beginning. Defaults to False.
             **metadata_kwargs: Additional metadata arguments for the video.
 
         Returns:
-            Dict: A dictionary containing the fetched comments and the YouTube service instance.
+            Dict: A dictionary containing the fetched comments, the page token to resume from
+            (None once caught up) and the YouTube service instance.
+        """
+        results = []
+        page_token = db.get_progress(video_id)
+        for rows, page_token in self.iter_comment_pages(
+                youtube_client, video_id, channel_id, db,
+                max_results=max_results,
+                initial_fetch_date=initial_fetch_date,
+                ignore_progress=ignore_progress,
+                **metadata_kwargs
+        ):
+            results.extend(rows)
+        return {"comments": results, "page_token": page_token, "youtube_service": youtube_client.service}
+
+    def iter_comment_pages(
+            self,
+            youtube_client,
+            video_id: str,
+            channel_id: str,
+            db,
+            max_results: int = 100,
+            initial_fetch_date: Union[str, datetime] = CUTOFF_DATETIME,
+            ignore_progress: bool = False,
+            **metadata_kwargs
+    ) -> Iterator[Tuple[List[Dict], Optional[str]]]:
+        """
+        Yields the new comments of a video one page at a time, resuming from saved progress.
+
+        Only the current page is held in memory, so callers can store each page
+        before the next one is fetched. Progress is not written here: each page comes
+        with the token to resume from, which the caller saves under the video ID only
+        after the page's comments are stored, so a video is never marked caught up
+        ahead of its comments. A failed request ends the iteration without a token.
+
+        Args:
+            youtube_client: The YouTube API client used to fetch comments.
+            video_id (str): The ID of the video to fetch comments for.
+            channel_id (str): The ID of the channel associated with the video.
+            db: The database instance to store progress and retrieve metadata.
+            max_results (int): The maximum number of comments to fetch per page. Defaults to 100.
+            initial_fetch_date (Union[str, datetime]): The initial date to use for fetching comments.
+                Defaults to CUTOFF_DATE.
+            ignore_progress (bool): Whether to ignore saved progress and start from the beginning. Defaults to False.
+            **metadata_kwargs: Additional metadata arguments for the video.
+
+        Yields:
+            Tuple[List[Dict], Optional[str]]: The new comments found on each page and the
+            token of the next page, or None once the video is caught up.
         """
+        if not isinstance(initial_fetch_date, datetime):
+            initial_fetch_date = parse_timestamp(initial_fetch_date)
+
         # Fallback metadata values
         fallback_metadata = {
             "video_title": f"Unknown Title ({video_id})",
             "channel_name": f"Unknown Channel ({channel_id})",
-            "video_publish_date": parse(initial_fetch_date),
+            "video_publish_date": initial_fetch_date,
         }
 
         # Attempt to fetch metadata
@@ -137,49 +211,64 @@ class CommentManager:
         page_token = None if ignore_progress else db.get_progress(video_id)
         prev_token = "__first_pass"
         most_recent = self.get_most_recent_comment_date(db, channel_id, video_id, initial_fetch_date)
+        # YouTube timestamps are fixed-width UTC strings, so comparing them as strings
+        # orders them like datetimes and lets stored comments skip parsing entirely.
+        most_recent_str = most_recent.astimezone(timezone.utc).strftime(YT_TIMESTAMP_FORMAT)
 
-        results = []
         while True:
             if page_token is not None and page_token == prev_token:
                 logger.warning('Page token "%s" repeated – aborting', page_token)
-                break
+                return
             prev_token = page_token
 
             page, next_token, service = self.fetch_comments_page(
                 youtube_client, video_id, page_token, max_results
             )
+            # A failed request yields nothing, so the saved token is kept and the video
+            # is fetched again on the next run instead of being marked caught up.
+            if page is None:
+                logger.warning("Fetching comments for video %s failed – keeping its progress", video_id)
+                return
             if not page:
-                db.save_progress(video_id, None)
-                break
-
-            new_rows = []
-            for item in page:
-                snip = item["snippet"]["topLevelComment"]["snippet"]
-                c_date: datetime = parse(snip["updatedAt"])
-                if c_date > most_recent and c_date >= video_publish_date:
-                    new_rows.append({
-                        "video_id": video_id,
-                        "video_title": video_title,
-                        "channel_id": channel_id,
-                        "channel_name": channel_name,
-                        "video_publish_date": video_publish_date,
-                        "comment_id": item["id"],
-                        "author": snip.get("authorDisplayName"),
-                        "author_channel_id": snip.get("authorChannelId", {}).get("value"),
-                        "text": snip.get("textDisplay"),
-                        "like_count": snip.get("likeCount"),
-                        "published_at": snip.get("publishedAt"),
-                        "updated_at": snip["updatedAt"],
-                    })
-            if new_rows:
-                results.extend(new_rows)
-
-            if next_token:
-                db.save_progress(video_id, next_token)
-                page_token = next_token
-                continue
-            else:
-                db.save_progress(video_id, None)
-                break
-
-        return {"comments": results, "youtube_service": youtube_client.service}
\ No newline at end of file
+                yield [], None
+                return
+
+            # Threads come back newest first, so if the first one is already stored
+            # nothing on this page or any later page can be new.
+            if page[0]["snippet"]["topLevelComment"]["snippet"]["updatedAt"] <= most_recent_str:
+                yield [], None
+                return
+
+            rows = [
+                {
+                    "video_id": video_id,
+                    "video_title": video_title,
+                    "channel_id": channel_id,
+                    "channel_name": channel_name,
+                    "video_publish_date": video_publish_date,
+                    "comment_id": item["id"],
+                    "author": snip.get("authorDisplayName"),
+                    "author_channel_id": (snip.get("authorChannelId") or _NO_AUTHOR).get("value"),
+                    "text": snip.get("textDisplay"),
+                    "like_count": snip.get("likeCount"),
+                    "published_at": snip.get("publishedAt"),
+                    "updated_at": snip["updatedAt"],
+                    "published_ts": epoch_seconds(snip.get("publishedAt")),
+                    "updated_ts": int(c_date.timestamp()),
+                }
+                for item in page
+                for snip in (item["snippet"]["topLevelComment"]["snippet"],)
+                if snip["updatedAt"] > most_recent_str
+                and (c_date := parse_timestamp(snip["updatedAt"])) > most_recent
+                and c_date >= video_publish_date
+            ]
+
+            # A page ending at or before the stored comment means the next one holds
+            # nothing new either, so it is not requested.
+            if next_token and page[-1]["snippet"]["topLevelComment"]["snippet"]["updatedAt"] <= most_recent_str:
+                next_token = None
+
+            yield rows, next_token
+            if not next_token:
+                return
+            page_token = next_token
\ No newline at end of file
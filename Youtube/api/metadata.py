@@ -3,12 +3,14 @@ import logging
 from datetime import datetime
 from typing import Dict, Optional, Sequence, Tuple
 
-from dateutil.parser import parse
-
 from utils.cache import CacheManager
+from utils.timestamps import parse_timestamp
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of comma-separated IDs accepted by a single videos().list call.
+MAX_IDS_PER_REQUEST = 50
+
 
 class MetadataManager:
     """
@@ -43,6 +45,10 @@ class MetadataManager:
         """
         Fetches metadata for a batch of YouTube videos.
 
+        Uncached IDs are requested in chunks of up to MAX_IDS_PER_REQUEST per call. Channel
+        names are taken from each video's snippet; only videos returned without one have
+        their channel looked up, in one batched pass.
+
         Args:
             youtube_client: The YouTube API client used to fetch metadata.
             video_ids (Sequence[str]): A list of video IDs to fetch metadata for.
@@ -55,10 +61,13 @@ class MetadataManager:
         if not video_ids:
             return {}
 
-        # Filter out video IDs that are already cached
-        missing_ids = [vid for vid in video_ids if vid not in self.cache.video_cache]
+        # Filter out video IDs that are already cached, in memory or on disk
+        self.cache.load_videos(video_ids)
+        missing_ids = list(dict.fromkeys(vid for vid in video_ids if vid not in self.cache.video_cache))
+
+        for start in range(0, len(missing_ids), MAX_IDS_PER_REQUEST):
+            chunk = missing_ids[start:start + MAX_IDS_PER_REQUEST]
 
-        if missing_ids:
             def _videos_request(svc):
                 """
                 Constructs the API request for fetching video metadata.
@@ -71,9 +80,9 @@ class MetadataManager:
                 """
                 return svc.videos().list(
                     part="snippet",
-                    id=",".join(missing_ids),
-                    maxResults=len(missing_ids),
-                    fields="items(id,snippet(channelId,title,publishedAt))",
+                    id=",".join(chunk),
+                    maxResults=len(chunk),
+                    fields="items(id,snippet(channelId,channelTitle,title,publishedAt))",
                 )
 
             # Fetch metadata for missing video IDs
@@ -83,16 +92,33 @@ class MetadataManager:
                     video_id = item["id"]
                     snippet = item["snippet"]
                     channel_id = snippet["channelId"]
-                    owner_name = self.cache.channel_cache.get(channel_id)
+                    owner_name = snippet.get("channelTitle")
+                    if owner_name:
+                        if self.cache.channel_cache.get(channel_id) != owner_name:
+                            self.cache.channel_cache[channel_id] = owner_name
+                    else:
+                        owner_name = self.cache.channel_cache.get(channel_id)
 
                     # Cache the fetched metadata
                     self.cache.video_cache[video_id] = (
                         snippet["title"],
                         owner_name,
-                        parse(snippet["publishedAt"]) if snippet.get("publishedAt") else None,
+                        parse_timestamp(snippet["publishedAt"]) if snippet.get("publishedAt") else None,
                         channel_id,
                     )
 
+        # Fill in channel names for newly cached videos with one batched lookup
+        if missing_ids:
+            unnamed = {
+                vid: entry for vid in missing_ids
+                if (entry := self.cache.video_cache.get(vid)) is not None and entry[1] is None
+            }
+            if unnamed:
+                names = self.batch_fetch_channel_names(youtube_client, [entry[3] for entry in unnamed.values()])
+                for vid, (title, _, publish_dt, owner_id) in unnamed.items():
+                    if owner_id in names:
+                        self.cache.video_cache[vid] = (title, names[owner_id], publish_dt, owner_id)
+
         # Return metadata for all requested video IDs, including cached ones
         return {
             vid: (cached[0], cached[2], cached[3])
@@ -122,46 +148,90 @@ class MetadataManager:
         # Check if metadata is already cached
         if video_id in self.cache.video_cache:
             logger.info("Cache hit for video ID: %s", video_id)
-            return self.cache.video_cache[video_id]
+            title, owner_name, publish_dt, owner_id = self.cache.video_cache[video_id]
+            if owner_name is None and owner_id:
+                owner_name = self.fetch_channel_name(youtube_client, owner_id)
+                self.cache.video_cache[video_id] = (title, owner_name, publish_dt, owner_id)
+            return title, owner_name, publish_dt, owner_id
 
         logger.info("Cache miss for video ID: %s. Fetching from API...", video_id)
 
-        def _req(svc):
-            """
-            Constructs the API request for fetching video metadata.
-
-            Args:
-                svc: The YouTube API service instance.
-
-            Returns:
-                The API request object.
-            """
-            return svc.videos().list(
-                part="snippet",
-                id=video_id,
-                maxResults=1,
-                fields="items(snippet(channelId,title,publishedAt))",
-            )
-
         try:
-            # Fetch metadata from the YouTube API
-            resp, service = youtube_client.retry_request(_req)
-            if not resp or not resp.get("items"):
+            # Fetch metadata through the batch path so channel names are batched too
+            self.batch_fetch_video_metadata(youtube_client, [video_id])
+            cached = self.cache.video_cache.get(video_id)
+            if cached is None:
                 logger.warning("No metadata found for video ID: %s", video_id)
                 return None, None, None, None
 
-            snip = resp["items"][0]["snippet"]
-            owner_id = snip["channelId"]
-            title = snip["title"]
-            publish_dt = parse(snip["publishedAt"]) if snip.get("publishedAt") else None
-            owner_name = self.cache.channel_cache.get(owner_id)
-
-            # Cache the fetched metadata
-            self.cache.video_cache[video_id] = (title, owner_name, publish_dt, owner_id)
+            title, owner_name, publish_dt, owner_id = cached
             logger.info("Successfully fetched metadata for video ID: %s", video_id)
             return title, owner_name, publish_dt, owner_id
 
         except Exception as e:
             # Log any errors encountered during metadata fetching
             logger.error("Error fetching metadata for video ID: %s. Exception: %s", video_id, e, exc_info=True)
-            return None, None, None, None
\ No newline at end of file
+            return None, None, None, None
+
+    def fetch_channel_name(self, youtube_client, channel_id: str) -> Optional[str]:
+        """
+        Fetches the display name of a YouTube channel, using the channel cache when possible.
+
+        Args:
+            youtube_client: The YouTube API client used to fetch channel details.
+            channel_id (str): The ID of the channel to fetch the name for.
+
+        Returns:
+            Optional[str]: The channel name, or None if it could not be retrieved.
+        """
+        channel_name = self.batch_fetch_channel_names(youtube_client, [channel_id]).get(channel_id)
+        if channel_name is None:
+            logger.warning("No channel name found for channel ID: %s", channel_id)
+        return channel_name
+
+    def batch_fetch_channel_names(self, youtube_client, channel_ids: Sequence[str]) -> Dict[str, str]:
+        """
+        Fetches the display names of several YouTube channels.
+
+        Uncached IDs are requested in chunks of up to MAX_IDS_PER_REQUEST per call.
+
+        Args:
+            youtube_client: The YouTube API client used to fetch channel details.
+            channel_ids (Sequence[str]): The IDs of the channels to fetch names for.
+
+        Returns:
+            Dict[str, str]: A dictionary mapping channel IDs to channel names. Channels
+            that could not be retrieved are omitted.
+        """
+        missing_ids = list(dict.fromkeys(cid for cid in channel_ids if cid not in self.cache.channel_cache))
+
+        for start in range(0, len(missing_ids), MAX_IDS_PER_REQUEST):
+            chunk = missing_ids[start:start + MAX_IDS_PER_REQUEST]
+
+            def _req(svc):
+                """
+                Constructs the API request for fetching channel titles.
+
+                Args:
+                    svc: The YouTube API service instance.
+
+                Returns:
+                    The API request object.
+                """
+                return svc.channels().list(
+                    part="snippet",
+                    id=",".join(chunk),
+                    maxResults=len(chunk),
+                    fields="items(id,snippet(title))",
+                )
+
+            resp, service = youtube_client.retry_request(_req)
+            if resp:
+                for item in resp.get("items", []):
+                    self.cache.channel_cache[item["id"]] = item["snippet"]["title"]
+
+        return {
+            cid: name
+            for cid in channel_ids
+            if (name := self.cache.channel_cache.get(cid)) is not None
+        }
@@ -1,15 +1,37 @@
 # File: Youtube/api/playlists.py
 
-import json
 import logging
 import os
 import pathlib
-from typing import List, Tuple, Optional
+import re
+import time
+from functools import lru_cache
+from typing import Iterator, List, Tuple, Optional
+
+import orjson
 
 from api.metadata import MetadataManager
 
 logger = logging.getLogger(__name__)
 
+# Directory holding the on-disk playlist caches and how long their entries stay valid.
+PLAYLIST_CACHE_DIR = "yt_cache"
+PLAYLIST_CACHE_TTL = 24 * 60 * 60
+
+
+@lru_cache(maxsize=32)
+def keyword_pattern(keywords: Tuple[str, ...]):
+    """
+    Compiles a case-insensitive alternation matching any of the given keywords.
+
+    Args:
+        keywords (Tuple[str, ...]): The keywords to match.
+
+    Returns:
+        re.Pattern: The compiled pattern.
+    """
+    return re.compile("|".join(re.escape(k) for k in keywords), re.IGNORECASE)
+
 
 class PlaylistManager:
     """
@@ -33,6 +55,7 @@ class PlaylistManager:
                 MetadataManager for fetching video metadata.
         """
         self.metadata = metadata_manager
+        pathlib.Path(PLAYLIST_CACHE_DIR).mkdir(exist_ok=True)
 
     def generate_videos_by_search(
             self,
@@ -66,6 +89,7 @@ class PlaylistManager:
                     maxResults=max_results,
                     order="date",
                     pageToken=page_token,
+                    fields="nextPageToken,items(id/videoId)",
                 )
 
             resp, service = youtube_client.retry_request(_req)
@@ -100,16 +124,22 @@ class PlaylistManager:
             max_results (int): The maximum number of results per page. Defaults to 10.
 
         Yields:
-            Tuple[str, str]: A tuple containing playlist ID and playlist title.
+            Tuple[str, str, str]: A tuple containing playlist ID, playlist title, and the
+            playlist's ISO 8601 publish date.
         """
+        if not keywords:
+            return
+        keyword_re = keyword_pattern(tuple(keywords))
+
         page_token = None
         while True:
             def _req(svc):
                 return svc.playlists().list(
-                    part="id,snippet",
+                    part="snippet",
                     channelId=channel_id,
                     maxResults=max_results,
                     pageToken=page_token,
+                    fields="nextPageToken,items(id,snippet(title,publishedAt))",
                 )
 
             resp, service = youtube_client.retry_request(_req)
@@ -117,9 +147,10 @@ class PlaylistManager:
                 break
 
             for item in resp.get("items", []):
-                title = item["snippet"]["title"].lower()
-                if any(k.lower() in title for k in keywords):
-                    yield item["id"], item["snippet"]["title"]
+                snippet = item["snippet"]
+                title = snippet["title"]
+                if keyword_re.search(title):
+                    yield item["id"], title, snippet.get("publishedAt", "")
 
             page_token = resp.get("nextPageToken")
             if not page_token:
@@ -138,31 +169,142 @@ class PlaylistManager:
         Yields:
             str: The video ID of each video in the playlist.
         """
+        for video_ids, _ in PlaylistManager._playlist_item_pages(youtube_client, playlist_id, max_results):
+            yield from video_ids
+
+    @staticmethod
+    def _playlist_item_pages(youtube_client, playlist_id: str,
+                             max_results: int = 50) -> Iterator[Tuple[List[str], Optional[str]]]:
+        """
+        Pages through the items of a playlist.
+
+        Stops early if a request fails, in which case the last yielded token is not None.
+
+        Args:
+            youtube_client: The YouTube API client used to fetch playlist items.
+            playlist_id (str): The ID of the playlist to fetch videos from.
+            max_results (int): The maximum number of results per page. Defaults to 50.
+
+        Yields:
+            Tuple[List[str], Optional[str]]: The video IDs on each page and the token of
+            the next page, or None after the last page.
+        """
         page_token = None
         while True:
             def _req(svc):
                 return svc.playlistItems().list(
-                    part="snippet,contentDetails",
+                    part="contentDetails",
                     playlistId=playlist_id,
                     maxResults=max_results,
                     pageToken=page_token,
+                    fields="nextPageToken,items/contentDetails/videoId",
                 )
 
             resp, service = youtube_client.retry_request(_req)
             if not resp:
-                break
-
-            for item in resp.get("items", []):
-                yield item["contentDetails"]["videoId"]
+                return
 
             page_token = resp.get("nextPageToken")
+            yield [item["contentDetails"]["videoId"] for item in resp.get("items", [])], page_token
             if not page_token:
-                break
+                return
+
+    @staticmethod
+    def get_uploads_playlist(youtube_client, channel_id: str) -> Optional[str]:
+        """
+        Retrieves the ID of a channel's uploads playlist.
+
+        Args:
+            youtube_client: The YouTube API client used to fetch channel details.
+            channel_id (str): The ID of the channel.
+
+        Returns:
+            Optional[str]: The uploads playlist ID, or None if unavailable.
+        """
+        def _req(svc):
+            return svc.channels().list(
+                part="contentDetails",
+                id=channel_id,
+                maxResults=1,
+                fields="items(contentDetails(relatedPlaylists(uploads)))",
+            )
+
+        resp, service = youtube_client.retry_request(_req)
+        if not resp or not resp.get("items"):
+            return None
+        return resp["items"][0]["contentDetails"]["relatedPlaylists"].get("uploads")
+
+    @staticmethod
+    def _read_cache_file(cache_file: str):
+        """
+        Loads a cached API result if the cache file exists and has not expired.
+
+        Args:
+            cache_file (str): The path of the cache file.
+
+        Returns:
+            The cached data, or None if the file is missing or older than PLAYLIST_CACHE_TTL.
+        """
+        try:
+            with open(cache_file, "rb") as fp:
+                if time.time() - os.fstat(fp.fileno()).st_mtime > PLAYLIST_CACHE_TTL:
+                    return None
+                return orjson.loads(fp.read())
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_cache_file(cache_file: str, data) -> None:
+        """
+        Writes an API result to a cache file.
+
+        Args:
+            cache_file (str): The path of the cache file.
+            data: The JSON-serializable data to cache.
+        """
+        with open(cache_file, "wb") as fp:
+            fp.write(orjson.dumps(data))
+
+    def cached_playlist_videos(self, youtube_client, playlist_id: str, max_results: int = 50) -> Iterator[str]:
+        """
+        Retrieves video IDs from a playlist, serving them from the disk cache when fresh.
+
+        On a cache miss the IDs are yielded page by page and cached once the playlist
+        has been read to the end. An interrupted listing starts again from the first
+        page, at 1 quota unit per page; videos already caught up are skipped by the caller.
+
+        Args:
+            youtube_client: The YouTube API client used to fetch playlist items.
+            playlist_id (str): The ID of the playlist to fetch videos from.
+            max_results (int): The maximum number of results per page. Defaults to 50.
+
+        Yields:
+            str: The video ID of each video in the playlist.
+        """
+        cache_file = os.path.join(PLAYLIST_CACHE_DIR, f"pl_items_{playlist_id}.json")
+        cached = self._read_cache_file(cache_file)
+        if cached is not None:
+            yield from cached
+            return
+
+        video_ids = []
+        complete = False
+        for page_ids, next_token in self._playlist_item_pages(youtube_client, playlist_id, max_results):
+            video_ids.extend(page_ids)
+            yield from page_ids
+            complete = not next_token
+
+        if complete:
+            self._write_cache_file(cache_file, video_ids)
 
     def cached_search_playlists(self, youtube_client, channel_id: str, keywords: List[str]) -> List[Tuple[str, str]]:
         """
         Searches for playlists matching keywords and caches the results.
 
+        Playlists are ordered newest first, so if the quota runs out partway through a
+        channel the most recent playlists have been processed. Cached results expire
+        after PLAYLIST_CACHE_TTL seconds.
+
         Args:
             youtube_client: The YouTube API client used to perform the search.
             channel_id (str): The ID of the channel to search within.
@@ -171,32 +313,16 @@ class PlaylistManager:
         Returns:
             List[Tuple[str, str]]: A list of tuples containing playlist IDs and titles.
         """
-        cache_file = f"yt_cache/pl_{channel_id}.json"
-        if os.path.exists(cache_file):
-            with open(cache_file, "r", encoding="utf-8") as fp:
-                return json.load(fp)
-
-        playlists = list(self.generate_playlists(youtube_client, channel_id, keywords))
-        if not playlists:
-            def _search_req(svc):
-                return svc.search().list(
-                    part="snippet",
-                    channelId=channel_id,
-                    q=" | ".join(keywords),
-                    type="playlist",
-                    maxResults=5,
-                    fields="items(id/playlistId,snippet/title)",
-                )
-
-            resp, service = youtube_client.retry_request(_search_req)
-            if resp:
-                playlists = [
-                    (it["id"]["playlistId"], it["snippet"]["title"])
-                    for it in resp.get("items", [])
-                ]
-
-        pathlib.Path("yt_cache").mkdir(exist_ok=True)
-        with open(cache_file, "w", encoding="utf-8") as fp:
-            json.dump(playlists, fp)
-
+        cache_file = os.path.join(PLAYLIST_CACHE_DIR, f"pl_{channel_id}.json")
+        cached = self._read_cache_file(cache_file)
+        if cached is not None:
+            return cached
+
+        found = sorted(
+            self.generate_playlists(youtube_client, channel_id, keywords),
+            key=lambda pl: pl[2],
+            reverse=True,
+        )
+        playlists = [(pl_id, title) for pl_id, title, _ in found]
+        self._write_cache_file(cache_file, playlists)
         return playlists
\ No newline at end of file
@@ -1,20 +1,30 @@
 # File: Youtube/api/youtube_client.py
 
-import json
+import hashlib
 import logging
 import random
+import threading
 import time
-from itertools import cycle
-from time import time
+from email.utils import parsedate_to_datetime
+from itertools import count
 from typing import Tuple, Optional, Any, Callable
 
+import httplib2
+import orjson
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.model import JsonModel
 
 from config import API_KEYS
+from utils.rate_limiter import TokenBucket
 
 logger = logging.getLogger(__name__)
 
+HTTP_TIMEOUT = 60
+
+# Upper bound (in seconds) for a single retry delay or key cooldown.
+MAX_BACKOFF = 30.0
+
 
 class QuotaExhaustedError(Exception):
     """
@@ -23,44 +33,200 @@ class QuotaExhaustedError(Exception):
     pass
 
 
+class OrjsonModel(JsonModel):
+    """
+    JSON model that decodes API responses with orjson instead of the json module.
+    """
+
+    def deserialize(self, content):
+        """
+        Decodes the body of an HTTP response.
+
+        Args:
+            content: The body of the HTTP response.
+
+        Returns:
+            The decoded body, or the raw content if it is not valid JSON.
+        """
+        try:
+            body = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            return content
+        if self._data_wrapper and isinstance(body, dict) and "data" in body:
+            body = body["data"]
+        return body
+
+
 class YouTubeClient:
     """
     Client to interact with the YouTube API.
 
     This class manages API key rotation, handles quota exhaustion, and retries
-    requests to the YouTube API with exponential backoff in case of transient errors.
+    requests to the YouTube API with capped, jittered exponential backoff in case of
+    transient errors. Requests are paced client-side with one token bucket per API key.
+    A rate-limited key is put on a cooldown that the request waits out before retrying
+    the same key; rotation skips keys that are still cooling down.
 
     Attributes:
         api_keys (list): A list of API keys for interacting with the YouTube API.
-        api_key_cycle (cycle): A cycle iterator for rotating through API keys.
+        api_key_index (count): A counter whose value modulo the number of keys selects the next API key.
+        current_api_key (str): The API key every thread uses until its quota is exhausted.
         global_backoff_time (int): The time (in seconds) to wait when all API keys are exhausted.
         last_global_exhaust_time (float): The timestamp of the last global quota exhaustion.
-        service: The YouTube API service instance.
+        requests_per_second (float): The sustained request rate allowed per API key.
+        burst (int): The number of requests per API key that may be sent back to back.
+        service: The YouTube API service instance for the calling thread.
     """
 
-    def __init__(self, api_keys: list = None):
+    def __init__(self, api_keys: list = None, requests_per_second: float = 10.0, burst: int = 10):
         """
         Initializes the YouTubeClient with a list of API keys.
 
         Args:
             api_keys (list, optional): A list of API keys. Defaults to the API_KEYS from the config.
+            requests_per_second (float): The sustained request rate allowed per API key. Defaults to 10.
+            burst (int): The number of requests per API key that may be sent back to back. Defaults to 10.
         """
         self.api_keys = api_keys or API_KEYS
-        self.api_key_cycle = cycle(self.api_keys)
+        self.api_key_index = count()
         self.global_backoff_time = 600
         self.last_global_exhaust_time = 0
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self._rate_limiters = {key: TokenBucket(requests_per_second, burst) for key in self.api_keys}
+        self._cooldown_until = {key: 0.0 for key in self.api_keys}
+        self._consecutive_throttles = {key: 0 for key in self.api_keys}
+        self._key_lock = threading.Lock()
+        self._rotation_lock = threading.Lock()
+        self._services = {}
+        self._key_fingerprints = {
+            key: hashlib.blake2b(key.encode(), digest_size=4).hexdigest() for key in self.api_keys
+        }
+        self._local = threading.local()
+        self.current_api_key = self._next_api_key()
         self.service = self._build_service()
 
+    @property
+    def service(self):
+        """
+        Returns the YouTube API service instance for the calling thread.
+
+        Service instances are shared between threads; requests are executed over the
+        calling thread's own transport (see `_http`). A thread whose service was built
+        for a key that has since been rotated away from switches to the current key.
+
+        Returns:
+            The YouTube API service instance.
+        """
+        service = getattr(self._local, "service", None)
+        if service is None or self._local.api_key != self.current_api_key:
+            service = self._local.service = self._build_service()
+        return service
+
+    @service.setter
+    def service(self, value) -> None:
+        """
+        Sets the YouTube API service instance for the calling thread.
+
+        Args:
+            value: The YouTube API service instance.
+        """
+        self._local.service = value
+
+    def _next_api_key(self) -> str:
+        """
+        Returns the next API key in the rotation that is not cooling down.
+
+        If every key is cooling down, waits until the earliest cooldown ends and
+        returns that key.
+
+        Returns:
+            str: The API key to use.
+        """
+        now = time.time()
+        total_keys = len(self.api_keys)
+        with self._key_lock:
+            for _ in range(total_keys):
+                api_key = self.api_keys[next(self.api_key_index) % total_keys]
+                if self._cooldown_until[api_key] <= now:
+                    return api_key
+            api_key = min(self.api_keys, key=self._cooldown_until.__getitem__)
+            wait = self._cooldown_until[api_key] - now
+        logger.warning("All keys cooling down – sleeping %.1f s …", wait)
+        time.sleep(wait)
+        return api_key
+
+    def _rotate_key(self, exhausted_key: str) -> None:
+        """
+        Moves the shared current API key on from a key whose quota is exhausted.
+
+        Threads that hit the same exhausted key at once rotate only once.
+
+        Args:
+            exhausted_key (str): The API key whose quota is exhausted.
+        """
+        with self._rotation_lock:
+            if self.current_api_key == exhausted_key:
+                self.current_api_key = self._next_api_key()
+
+    def _throttle_key(self, api_key: str, backoff_factor: float, min_delay: float = 0.0) -> float:
+        """
+        Puts an API key on a cooldown that grows with its consecutive throttling errors.
+
+        Args:
+            api_key (str): The throttled API key.
+            backoff_factor (float): The base delay of the cooldown.
+            min_delay (float): The shortest cooldown, e.g. a server-sent Retry-After. Defaults to 0.
+
+        Returns:
+            float: The cooldown in seconds.
+        """
+        with self._key_lock:
+            self._consecutive_throttles[api_key] += 1
+            delay = min(MAX_BACKOFF, backoff_factor * 2 ** self._consecutive_throttles[api_key])
+            delay = max(min_delay, delay * (1 + random.random() * 0.5))
+            self._cooldown_until[api_key] = time.time() + delay
+        return delay
+
     def _build_service(self):
         """
-        Builds the YouTube API service instance using the next API key.
+        Returns a YouTube API service instance for the current API key.
+
+        Services are built from the bundled discovery document once per key for the
+        whole process and reused on later rotations and by every thread, so cycling
+        back to a key does not rebuild the discovery resource tree. Responses are
+        decoded with `OrjsonModel`.
 
         Returns:
             The YouTube API service instance.
         """
-        api_key = next(self.api_key_cycle)
-        logger.info("Using API key %s", api_key)
-        return build("youtube", "v3", developerKey=api_key, cache_discovery=False)
+        api_key = self.current_api_key
+        self._local.api_key = api_key
+        with self._key_lock:
+            service = self._services.get(api_key)
+            if service is None:
+                logger.debug("Using API key fp=%s", self._key_fingerprints[api_key])
+                service = self._services[api_key] = build(
+                    "youtube", "v3", developerKey=api_key,
+                    cache_discovery=False, static_discovery=True, model=OrjsonModel(),
+                )
+        return service
+
+    def _http(self) -> httplib2.Http:
+        """
+        Returns the keep-alive HTTP transport of the calling thread.
+
+        httplib2 transports are not thread-safe, so each thread executes its requests
+        over its own instance, shared by all API keys so key rotation reuses the
+        already open TLS connection.
+
+        Returns:
+            httplib2.Http: The transport for the calling thread.
+        """
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = self._local.http = httplib2.Http(timeout=HTTP_TIMEOUT)
+        return http
 
     def retry_request(
             self,
@@ -71,6 +237,15 @@ class YouTubeClient:
         """
         Executes a YouTube API request with retries and exponential backoff.
 
+        Server errors are retried after a jittered delay capped at MAX_BACKOFF. Rate-limit
+        errors (HTTP 429 or userRateLimitExceeded) put the current key on a cooldown and
+        retry the same key once it has passed. Quota errors (quotaExceeded or
+        dailyLimitExceeded) rotate to the next key and raise QuotaExhaustedError once every
+        key has been tried. A Retry-After header sent with a server or rate-limit error is
+        the minimum sleep before the retry, so the request waits max(Retry-After, backoff).
+        Other threads using a key that is cooling down wait for the cooldown to end before
+        sending on it.
+
         Args:
             request_func (Callable): A function that constructs the API request.
             retries (int): The maximum number of retry attempts. Defaults to 5.
@@ -84,29 +259,45 @@ class YouTubeClient:
         total_keys = len(self.api_keys)
 
         for attempt in range(retries):
-            if rotations >= total_keys and time() - self.last_global_exhaust_time < self.global_backoff_time:
-                wait = self.global_backoff_time - (time() - self.last_global_exhaust_time)
+            if rotations >= total_keys and time.time() - self.last_global_exhaust_time < self.global_backoff_time:
+                wait = self.global_backoff_time - (time.time() - self.last_global_exhaust_time)
                 logger.warning("All keys exhausted – sleeping %.1f s …", wait)
                 time.sleep(wait)
                 rotations = 0
 
             try:
-                resp = request_func(self.service).execute()
+                service = self.service
+                cooldown = self._cooldown_until[self._local.api_key] - time.time()
+                if cooldown > 0:
+                    time.sleep(cooldown)
+                self._rate_limiters[self._local.api_key].acquire()
+                resp = request_func(service).execute(http=self._http())
+                self._consecutive_throttles[self._local.api_key] = 0
                 return resp, self.service
             except HttpError as e:
                 reason = self._extract_error_reason(e)
 
+                retry_after = self._retry_after(e)
+
                 if e.resp.status in (500, 502, 503, 504):
-                    time.sleep(backoff_factor * 2 ** attempt)
+                    delay = min(MAX_BACKOFF, backoff_factor * 2 ** attempt) * (1 + random.random() * 0.5)
+                    if retry_after:
+                        logger.debug("HttpError %s with Retry-After %.1f s", e.resp.status, retry_after)
+                    time.sleep(max(retry_after, delay))
                     continue
 
-                if e.resp.status == 403 and reason in {"quotaExceeded", "dailyLimitExceeded", "userRateLimitExceeded"}:
+                if e.resp.status == 429 or (e.resp.status == 403 and reason == "userRateLimitExceeded"):
+                    wait = max(retry_after, self._throttle_key(self._local.api_key, backoff_factor, retry_after))
+                    logger.warning("Rate limited (HttpError %s) – retrying in %.1f s", e.resp.status, wait)
+                    time.sleep(wait)
+                    continue
+
+                if e.resp.status == 403 and reason in {"quotaExceeded", "dailyLimitExceeded"}:
                     rotations += 1
                     if rotations >= total_keys:
-                        self.last_global_exhaust_time = time()
+                        self.last_global_exhaust_time = time.time()
                         raise QuotaExhaustedError("All API keys exhausted")
-                    self.service = self._build_service()
-                    time.sleep(backoff_factor * 2 ** attempt + random.random() * 0.1)
+                    self._rotate_key(self._local.api_key)
                     continue
 
                 logger.error("HttpError %s (%s) – not retrying", e.resp.status, reason)
@@ -119,6 +310,29 @@ class YouTubeClient:
         logger.error("All retries failed")
         return None, self.service
 
+    @staticmethod
+    def _retry_after(error: HttpError) -> float:
+        """
+        Extracts the delay requested by the Retry-After header of an HttpError.
+
+        Args:
+            error (HttpError): The HttpError instance.
+
+        Returns:
+            float: The delay in seconds, or 0 if the header is missing or malformed.
+        """
+        value = error.resp.get("retry-after")
+        if not value:
+            return 0.0
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (AttributeError, TypeError, ValueError):
+            return 0.0
+
     @staticmethod
     def _extract_error_reason(error: HttpError) -> Optional[str]:
         """
@@ -131,6 +345,6 @@ class YouTubeClient:
             Optional[str]: The error reason, or None if it cannot be extracted.
         """
         try:
-            return json.loads(error.content.decode())["error"]["errors"][0]["reason"]
+            return orjson.loads(error.content)["error"]["errors"][0]["reason"]
         except Exception:
             return None
\ No newline at end of file
@@ -1,6 +1,8 @@
 # File: arguments.py
 import argparse
 
+from core.processor import CHANNEL_WORKERS, INSERT_BATCH_SIZE, MAX_WORKERS
+
 
 def parse_cli() -> argparse.Namespace:
     """
@@ -73,5 +75,31 @@ def parse_cli() -> argparse.Namespace:
         help="Channel is flagged inactive if no upload in the last N days "
              "(used with --verify-channels).",
     )
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=MAX_WORKERS,
+        metavar="N",
+        help="Number of videos per channel whose comments are fetched concurrently.",
+    )
+    p.add_argument(
+        "--channel-workers",
+        type=int,
+        default=CHANNEL_WORKERS,
+        metavar="N",
+        help="Number of channels processed concurrently.",
+    )
+    p.add_argument(
+        "--batch-size",
+        type=int,
+        default=INSERT_BATCH_SIZE,
+        metavar="N",
+        help="Number of comments buffered before they are written to the database.",
+    )
+    p.add_argument(
+        "--force-refresh",
+        action="store_true",
+        help="Check videos and channels again even if an earlier run marked them as caught up.",
+    )
 
     return p.parse_args()
\ No newline at end of file
@@ -1,12 +1,31 @@
 # File: Youtube/core/processor.py
 
 import logging
-from typing import List, Dict
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, Sequence
 
-from config import CUTOFF_DATE, CHANNELS, KEYWORDS
+from api.comments import CUTOFF_DATETIME
+from api.metadata import MAX_IDS_PER_REQUEST
+from api.playlists import keyword_pattern
+from api.youtube_client import QuotaExhaustedError
+from config import CHANNELS, KEYWORDS
+from utils.timestamps import epoch_seconds, parse_timestamp
 
 logger = logging.getLogger(__name__)
 
+# Default number of videos per channel whose comments are fetched concurrently.
+MAX_WORKERS = 8
+
+# Default number of channels processed concurrently.
+CHANNEL_WORKERS = 4
+
+# Default number of buffered comments written per insert_comments call.
+INSERT_BATCH_SIZE = 1000
+
+# Default playlist keywords, normalised once so every channel shares the same tuple.
+DEFAULT_KEYWORDS = tuple(KEYWORDS)
+
 
 class YouTubeProcessor:
     """
@@ -14,10 +33,18 @@ class YouTubeProcessor:
 
     This class provides methods to fetch and process comments from playlists and channels,
     as well as to handle batch processing of multiple channels.
+
+    Attributes:
+        max_workers (int): The number of videos whose comments are fetched concurrently.
+        channel_workers (int): The number of channels processed concurrently.
+        insert_batch_size (int): The number of buffered comments written per insert_comments call.
+        force_refresh (bool): Whether videos and channels caught up in an earlier run are checked again.
     """
 
     def __init__(self, youtube_client, metadata_manager, comment_manager,
-                 channel_manager, playlist_manager):
+                 channel_manager, playlist_manager, max_workers: int = MAX_WORKERS,
+                 channel_workers: int = CHANNEL_WORKERS,
+                 insert_batch_size: int = INSERT_BATCH_SIZE, force_refresh: bool = False):
         """
         Initializes the YouTubeProcessor with required managers and a YouTube API client.
 
@@ -27,52 +54,198 @@ class YouTubeProcessor:
             comment_manager: An instance of CommentManager for managing comments.
             channel_manager: An instance of ChannelManager for managing channel-related operations.
             playlist_manager: An instance of PlaylistManager for handling playlists.
+            max_workers (int): The number of videos whose comments are fetched concurrently.
+                Defaults to MAX_WORKERS.
+            channel_workers (int): The number of channels processed concurrently.
+                Defaults to CHANNEL_WORKERS.
+            insert_batch_size (int): The number of buffered comments written per
+                insert_comments call. Defaults to INSERT_BATCH_SIZE.
+            force_refresh (bool): Whether videos and channels caught up in an earlier run
+                are checked again. Defaults to False.
         """
         self.youtube_client = youtube_client
         self.metadata = metadata_manager
         self.comments = comment_manager
         self.channels = channel_manager
         self.playlists = playlist_manager
+        self.max_workers = max_workers
+        self.channel_workers = channel_workers
+        self.insert_batch_size = insert_batch_size
+        self.force_refresh = force_refresh
 
-    def get_comments_by_playlist(self, channel_id: str, db, keywords: List[str]):
+    def get_comments_by_playlist(self, channel_id: str, db, keywords: Sequence[str]):
         """
         Fetches comments from videos in playlists matching the given keywords.
 
+        Videos from every matching playlist are fed into a single worker pool as the
+        playlists are paginated, so comment fetching overlaps playlist enumeration and
+        slow playlists do not hold up the rest of the channel. If no playlist matches,
+        the channel's uploads playlist is used instead and its videos are filtered by
+        title, which costs 1 quota unit per page rather than 100 per search request.
+
         Args:
             channel_id (str): The ID of the channel to fetch playlists from.
             db: The database instance for storing comments.
-            keywords (List[str]): A list of keywords to search for matching playlists.
+            keywords (Sequence[str]): The keywords to search for matching playlists.
 
         Returns:
             None
         """
-        processed = set()
         playlists = self.playlists.cached_search_playlists(self.youtube_client, channel_id, keywords)
 
+        title_keywords = None
         if not playlists:
-            logger.info("No matching playlists for %s", channel_id)
-            return
+            uploads = self.playlists.get_uploads_playlist(self.youtube_client, channel_id)
+            if not uploads:
+                logger.info("No matching playlists for %s", channel_id)
+                return
+            logger.info("No matching playlists for %s – filtering uploads by title", channel_id)
+            playlists = [(uploads, "uploads")]
+            title_keywords = keywords
+
+        self.fetch_videos_comments(
+            self._iter_playlist_videos(playlists, db, title_keywords), channel_id, db
+        )
+
+    def _iter_playlist_videos(self, playlists: List, db,
+                              title_keywords: Sequence[str] = None) -> Iterator[str]:
+        """
+        Yields the unique video IDs contained in the given playlists.
+
+        Videos whose comments were fully fetched by an earlier run (a progress
+        document with no page token) are skipped until that progress document expires,
+        unless `force_refresh` is set.
+        The completed keys are loaded in one query up front rather than probed per video.
+        Metadata for the remaining videos is fetched in batches before they are yielded,
+        so the per-video comment fetches find it in the cache.
+
+        Args:
+            playlists (List): A list of (playlist ID, playlist title) pairs.
+            db: The database instance used to look up per-video progress.
+            title_keywords (Sequence[str], optional): If given, only videos whose title
+                contains one of these keywords are yielded. Defaults to None.
 
+        Yields:
+            str: The ID of each video not yet seen in an earlier playlist or run.
+        """
+        # Caught-up videos from earlier runs and videos already yielded share one set.
+        seen = set() if self.force_refresh else db.get_completed_keys()
+        mark_seen = seen.add
+        title_re = keyword_pattern(tuple(title_keywords)) if title_keywords else None
+
+        def _ready(batch):
+            meta = self.metadata.batch_fetch_video_metadata(self.youtube_client, batch)
+            if title_re is None:
+                return batch
+            return [vid for vid in batch if vid in meta and title_re.search(meta[vid][0])]
+
+        pending = []
         for pl_id, pl_title in playlists:
             logger.info("Processing playlist %s – %s", pl_id, pl_title)
             try:
-                for vid in self.playlists.generate_videos(self.youtube_client, pl_id, max_results=100):
-                    if vid in processed:
+                for vid in self.playlists.cached_playlist_videos(self.youtube_client, pl_id, max_results=50):
+                    if vid in seen:
                         continue
-                    processed.add(vid)
-                    res = self.comments.fetch_comments_with_resume(
-                        self.youtube_client, vid, channel_id, db,
-                        max_results=100, initial_fetch_date=CUTOFF_DATE
-                    )
-                    if res["comments"]:
-                        db.insert_comments(res["comments"])
+                    mark_seen(vid)
+                    pending.append(vid)
+                    if len(pending) >= MAX_IDS_PER_REQUEST:
+                        yield from _ready(pending)
+                        pending = []
+            except QuotaExhaustedError:
+                raise
             except Exception as exc:
                 logger.error("Error processing playlist %s: %s", pl_id, exc)
 
-    def get_all_channel_comments(self, channel_id: str, db, max_results: int = 100, cutoff_date=CUTOFF_DATE):
+        if pending:
+            yield from _ready(pending)
+
+    def fetch_videos_comments(self, video_ids: Iterable[str], channel_id: str, db):
+        """
+        Fetches and stores comments for several videos concurrently.
+
+        Each video is submitted to a worker thread as soon as `video_ids` yields it;
+        the YouTube client gives every thread its own HTTP transport. Workers stream
+        comment pages into a shared buffer that is handed to the database's background
+        writer in batches of `insert_batch_size`, with a final flush once every worker
+        has finished, so no video's full comment list is held in memory and fetching
+        never waits on an insert. Each video's page token is queued together with the
+        batch holding its comments and saved only once that batch is stored, so a video
+        is never recorded as caught up before its comments are. The first
+        QuotaExhaustedError stops further videos from being submitted and cancels those
+        still queued.
+
+        Args:
+            video_ids (Iterable[str]): The IDs of the videos to fetch comments for.
+            channel_id (str): The ID of the channel the videos belong to.
+            db: The database instance for storing comments and progress.
+
+        Returns:
+            None
+        """
+        new_comments = []
+        new_progress = {}
+        buffer_lock = threading.Lock()
+        # Set by the first QuotaExhaustedError so no further videos are submitted or started.
+        stop = threading.Event()
+
+        def _flush_locked():
+            # Submitting under the lock keeps every token behind the rows it covers.
+            nonlocal new_comments, new_progress
+            if new_comments or new_progress:
+                db.submit_write(db.store_comments, new_comments, new_progress)
+            new_comments, new_progress = [], {}
+
+        def _consume(vid):
+            if stop.is_set():
+                return
+            try:
+                for rows, next_token in self.comments.iter_comment_pages(
+                        self.youtube_client, vid, channel_id, db,
+                        max_results=100, initial_fetch_date=CUTOFF_DATETIME,
+                ):
+                    with buffer_lock:
+                        new_comments.extend(rows)
+                        new_progress[vid] = next_token
+                        if len(new_comments) >= self.insert_batch_size:
+                            _flush_locked()
+            except QuotaExhaustedError:
+                stop.set()
+                raise
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {}
+                try:
+                    for vid in video_ids:
+                        if stop.is_set():
+                            break
+                        futures[executor.submit(_consume, vid)] = vid
+                except QuotaExhaustedError:
+                    # Listing the videos ran out of quota; drop whatever is still queued.
+                    stop.set()
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    raise
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except QuotaExhaustedError:
+                        stop.set()
+                        executor.shutdown(wait=True, cancel_futures=True)
+                        raise
+                    except Exception as exc:
+                        logger.error("Error fetching comments for video %s: %s", futures[future], exc)
+        finally:
+            with buffer_lock:
+                _flush_locked()
+
+    def get_all_channel_comments(self, channel_id: str, db, max_results: int = 100, cutoff_date=CUTOFF_DATETIME):
         """
         Fetches all comments from a channel, starting from the cutoff date.
 
+        The next page is requested in the background while the current page's video
+        metadata is looked up. Comments and the page token are handed to the database's
+        background writer in batches rather than written once per page.
+
         Args:
             channel_id (str): The ID of the channel to fetch comments from.
             db: The database instance for storing comments and progress.
@@ -83,38 +256,32 @@ class YouTubeProcessor:
             None
         """
         from datetime import datetime, timezone
-        from dateutil.parser import parse
 
-        cutoff_dt = cutoff_date if isinstance(cutoff_date, datetime) else parse(cutoff_date)
+        cutoff_dt = cutoff_date if isinstance(cutoff_date, datetime) else parse_timestamp(cutoff_date)
         if cutoff_dt.tzinfo is None:
             cutoff_dt = cutoff_dt.replace(tzinfo=timezone.utc)
 
         progress_key = f"chan::{channel_id}"
         page_token = db.get_progress(progress_key)
-        if page_token is None and db.progress_exists(progress_key):
+        if page_token is None and not self.force_refresh and db.progress_exists(progress_key):
             logger.debug("Channel %s up-to-date; skipping", channel_id)
             return
 
-        def _chan_req(svc):
+        chan_name = self.metadata.fetch_channel_name(self.youtube_client, channel_id)
+        if not chan_name:
+            logger.warning("Channel %s not found", channel_id)
+            return
+
+        def _page_request(token):
             """
-            Constructs the API request for fetching channel information.
+            Builds the request function for one page of the channel's comment threads.
 
             Args:
-                svc: The YouTube API service instance.
+                token: The page token to request, or None for the first page.
 
             Returns:
-                The API request object.
+                Callable: The request function to pass to `retry_request`.
             """
-            return svc.channels().list(part="snippet", id=channel_id, maxResults=1)
-
-        c_resp, service = self.youtube_client.retry_request(_chan_req)
-        if not c_resp or not c_resp.get("items"):
-            logger.warning("Channel %s not found", channel_id)
-            return
-
-        chan_name = c_resp["items"][0]["snippet"]["title"]
-
-        while True:
             def _page_req(svc):
                 """
                 Constructs the API request for fetching comments from a channel.
@@ -130,78 +297,147 @@ class YouTubeProcessor:
                     allThreadsRelatedToChannelId=channel_id,
                     maxResults=max_results,
                     order="time",
-                    pageToken=page_token,
+                    pageToken=token,
+                    fields=(
+                        "nextPageToken,items(id,snippet/topLevelComment/snippet(videoId,"
+                        "authorDisplayName,authorChannelId,textOriginal,likeCount,publishedAt,updatedAt))"
+                    ),
                 )
-
-            resp, service = self.youtube_client.retry_request(_page_req)
-            if not resp or not resp.get("items"):
-                db.save_progress(progress_key, None)
-                break
-
-            vids = {
-                itm["snippet"]["topLevelComment"]["snippet"].get("videoId")
-                for itm in resp["items"]
-            }
-            vids.discard(None)
-            meta = self.metadata.batch_fetch_video_metadata(self.youtube_client, list(vids))
-
-            rows = []
-            for itm in resp["items"]:
-                snip = itm["snippet"]["topLevelComment"]["snippet"]
-                comment_dt = parse(snip["updatedAt"]).astimezone(timezone.utc)
-                if comment_dt < cutoff_dt:
-                    db.save_progress(progress_key, None)
-                    return
-
-                vid = snip.get("videoId")
-                if not vid or vid not in meta:
-                    continue
-
-                title, pub_dt, owner_id = meta[vid]
-                if owner_id != channel_id:
-                    continue
-
-                rows.append({
-                    "video_id": vid,
-                    "video_title": title,
-                    "channel_id": channel_id,
-                    "channel_name": chan_name,
-                    "video_publish_date": pub_dt,
-                    "comment_id": itm["id"],
-                    "author": snip.get("authorDisplayName"),
-                    "author_channel_id": snip.get("authorChannelId"),
-                    "text": snip.get("textOriginal"),
-                    "like_count": snip.get("likeCount"),
-                    "published_at": snip.get("publishedAt"),
-                    "updated_at": snip["updatedAt"],
-                })
-
-            if rows:
-                db.insert_comments(rows)
-
-            page_token = resp.get("nextPageToken")
-            db.save_progress(progress_key, page_token)
-            if not page_token:
-                break
-
-    def process_channels(self, db, channels: Dict = None, keywords: List[str] = None):
+            return _page_req
+
+        # Rows are queued in batches of `insert_batch_size` together with the page token
+        # reached so far, which is only saved once the batch is stored, so the stored
+        # token never runs ahead of the stored comments.
+        rows = []
+        add_row = rows.append
+        with ThreadPoolExecutor(max_workers=1) as prefetch:
+            try:
+                future = prefetch.submit(self.youtube_client.retry_request, _page_request(page_token))
+                while True:
+                    resp, service = future.result()
+                    if not resp:
+                        # A failed request keeps the stored token so the next run retries it.
+                        logger.warning("Fetching comments for channel %s failed – keeping its progress", channel_id)
+                        break
+                    if not resp.get("items"):
+                        db.submit_write(db.store_comments, rows, {progress_key: None})
+                        rows = []
+                        break
+
+                    items = resp["items"]
+                    page_token = resp.get("nextPageToken")
+                    # Threads come back newest first, so the last one tells whether the
+                    # cutoff falls on this page and no further page is needed.
+                    oldest_dt = parse_timestamp(
+                        items[-1]["snippet"]["topLevelComment"]["snippet"]["updatedAt"]
+                    ).astimezone(timezone.utc)
+                    reached_cutoff = oldest_dt < cutoff_dt
+                    if page_token and not reached_cutoff:
+                        future = prefetch.submit(self.youtube_client.retry_request, _page_request(page_token))
+
+                    vids = {
+                        itm["snippet"]["topLevelComment"]["snippet"].get("videoId")
+                        for itm in items
+                    }
+                    vids.discard(None)
+                    meta = self.metadata.batch_fetch_video_metadata(self.youtube_client, list(vids))
+
+                    for itm in items:
+                        snip = itm["snippet"]["topLevelComment"]["snippet"]
+                        updated_at = snip["updatedAt"]
+                        comment_dt = parse_timestamp(updated_at).astimezone(timezone.utc)
+                        if comment_dt < cutoff_dt:
+                            break
+
+                        vid = snip.get("videoId")
+                        video_meta = meta.get(vid)
+                        if video_meta is None or video_meta[2] != channel_id:
+                            continue
+                        title, pub_dt, _ = video_meta
+
+                        add_row({
+                            "video_id": vid,
+                            "video_title": title,
+                            "channel_id": channel_id,
+                            "channel_name": chan_name,
+                            "video_publish_date": pub_dt,
+                            "comment_id": itm["id"],
+                            "author": snip.get("authorDisplayName"),
+                            "author_channel_id": snip.get("authorChannelId"),
+                            "text": snip.get("textOriginal"),
+                            "like_count": snip.get("likeCount"),
+                            "published_at": snip.get("publishedAt"),
+                            "updated_at": updated_at,
+                            "published_ts": epoch_seconds(snip.get("publishedAt")),
+                            "updated_ts": int(comment_dt.timestamp()),
+                        })
+
+                    if reached_cutoff or not page_token:
+                        db.submit_write(db.store_comments, rows, {progress_key: None})
+                        rows = []
+                        break
+
+                    if len(rows) >= self.insert_batch_size:
+                        db.submit_write(db.store_comments, rows, {progress_key: page_token})
+                        rows = []
+                        add_row = rows.append
+            finally:
+                if rows:
+                    db.submit_write(db.insert_comments, rows)
+
+    def process_channels(self, db, channels: Dict = None, keywords: Sequence[str] = None):
         """
         Processes a list of channels by fetching comments from playlists or all channel videos.
 
+        Channels are independent of each other, so up to `channel_workers` of them are
+        processed concurrently. The MongoDB client is thread-safe and the YouTube client
+        gives each thread its own HTTP transport. Once every API key's quota is exhausted,
+        channels that have not started yet are cancelled.
+
         Args:
             db: The database instance for storing comments and progress.
             channels (Dict, optional): A dictionary of channel names and their information. Defaults to CHANNELS.
-            keywords (List[str], optional): A list of keywords for playlist search. Defaults to KEYWORDS.
+            keywords (Sequence[str], optional): The keywords for playlist search. Defaults to KEYWORDS.
 
         Returns:
             None
         """
         channels = channels or CHANNELS
-        keywords = keywords if isinstance(keywords, list) else list(keywords or KEYWORDS)
-
-        for name, info in channels.items():
-            cid = info["channel_id"]
-            if info.get("only_wow"):
-                self.get_all_channel_comments(cid, db, max_results=100)
-            else:
-                self.get_comments_by_playlist(cid, db, keywords=keywords)
\ No newline at end of file
+        keywords = tuple(keywords) if keywords else DEFAULT_KEYWORDS
+
+        if not channels:
+            return
+
+        with ThreadPoolExecutor(max_workers=min(self.channel_workers, len(channels))) as executor:
+            futures = {
+                executor.submit(self._process_one_channel, info, db, keywords): name
+                for name, info in channels.items()
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except QuotaExhaustedError:
+                    logger.error("All API keys exhausted while processing channel %s – "
+                                 "cancelling the remaining channels", futures[future])
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    break
+                except Exception as exc:
+                    logger.error("Error processing channel %s: %s", futures[future], exc)
+
+    def _process_one_channel(self, info: Dict, db, keywords: Sequence[str]):
+        """
+        Fetches comments for a single channel.
+
+        Args:
+            info (Dict): The channel information, including its channel ID.
+            db: The database instance for storing comments and progress.
+            keywords (Sequence[str]): The keywords for playlist search.
+
+        Returns:
+            None
+        """
+        cid = info["channel_id"]
+        if info.get("only_wow"):
+            self.get_all_channel_comments(cid, db, max_results=100)
+        else:
+            self.get_comments_by_playlist(cid, db, keywords=keywords)
\ No newline at end of file
@@ -1,4 +1,6 @@
 import logging
+import queue
+import threading
 from datetime import datetime, timezone
 
 from pymongo import ASCENDING, DESCENDING, MongoClient, errors
@@ -6,6 +8,12 @@ from pymongo.operations import UpdateOne
 
 from config import MONGO_COLL, MONGO_DB, MONGO_URI
 
+# Server error code of a unique index violation.
+DUPLICATE_KEY_ERROR = 11000
+
+# Maximum number of writes waiting for the background writer before submit_write blocks.
+WRITE_QUEUE_SIZE = 4
+
 
 class DatabaseConnection:
     """
@@ -55,6 +63,9 @@ class DatabaseConnection:
         self.db = None
         self.collection = None
         self.progress_collection = None
+        self._write_queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self._writer = None
+        self._writer_lock = threading.Lock()
 
         self.logger = logging.getLogger(__name__)
         self.connect()
@@ -79,16 +90,6 @@ class DatabaseConnection:
             )
 
             desired_indexes = [
-                {
-                    "collection": self.collection,
-                    "keys": [
-                        ("channel_id", ASCENDING),
-                        ("like_count", ASCENDING),
-                        ("updated_at", ASCENDING),
-                    ],
-                    "unique": False,
-                    "name": "channel_like_updated_idx",
-                },
                 {
                     "collection": self.collection,
                     "keys": [
@@ -143,13 +144,14 @@ class DatabaseConnection:
         collection.create_index(keys, unique=unique, name=name, sparse=sparse)
         self.logger.info("Created index %s", name)
 
-    def get_most_recent_comment(self, channel_id, video_id):
+    def get_most_recent_comment(self, channel_id, video_id, projection=None):
         """
         Retrieves the most recent comment for the specified channel and video.
 
         Args:
             channel_id (str): The ID of the channel.
             video_id (str): The ID of the video.
+            projection (dict, optional): The fields to return. Defaults to the whole document.
 
         Returns:
             dict or None: The most recent comment document, or None if an error occurs.
@@ -157,6 +159,7 @@ class DatabaseConnection:
         try:
             return self.collection.find_one(
                 {"channel_id": channel_id, "video_id": video_id},
+                projection,
                 sort=[("updated_at", DESCENDING)],
             )
         except errors.PyMongoError as exc:
@@ -167,17 +170,24 @@ class DatabaseConnection:
         """
         Inserts or updates a batch of comments in the database.
 
+        Each comment dictionary is stored as given, keyed by its comment ID. If a batch
+        holds the same comment more than once, only its last occurrence is written.
+
         Args:
             comments (list): A list of comment dictionaries to insert or update.
 
+        Returns:
+            bool: True if every well-formed comment was written, False otherwise.
+
         Logs:
             Information about the number of upserted, matched, and modified documents.
         """
         if not isinstance(comments, list):
             self.logger.warning("insert_comments expects a list.")
-            return
+            return False
 
         batch, total_upserted, total_matched, total_modified = [], 0, 0, 0
+        succeeded = True
         required_keys = {
             "comment_id", "video_id", "video_title", "channel_id",
             "channel_name", "author", "text", "like_count",
@@ -185,7 +195,7 @@ class DatabaseConnection:
         }
 
         def flush(current_batch):
-            nonlocal total_upserted, total_matched, total_modified
+            nonlocal total_upserted, total_matched, total_modified, succeeded
             if not current_batch:
                 return
             try:
@@ -194,34 +204,30 @@ class DatabaseConnection:
                 total_matched += res.matched_count
                 total_modified += res.modified_count
             except errors.BulkWriteError as bwe:
-                self.logger.error("Bulk write error: %s", bwe.details)
+                details = bwe.details
+                total_upserted += details.get("nUpserted", 0)
+                total_matched += details.get("nMatched", 0)
+                total_modified += details.get("nModified", 0)
+                # Duplicate keys only mean a concurrent upsert inserted the comment first.
+                failed = [err for err in details.get("writeErrors", []) if err.get("code") != DUPLICATE_KEY_ERROR]
+                if failed:
+                    succeeded = False
+                    self.logger.error("Bulk write error: %s", failed)
             except errors.PyMongoError as exc:
+                succeeded = False
                 self.logger.error("insert_comments failed: %s", exc)
 
+        unique = {}
         for cm in comments:
             if not required_keys.issubset(cm):
                 self.logger.warning("Skipping malformed comment %s", cm.get("comment_id"))
                 continue
+            unique[cm["comment_id"]] = cm
 
-            batch.append(
-                UpdateOne(
-                    {"comment_id": cm["comment_id"]},
-                    {"$set": {
-                        "video_id": cm["video_id"],
-                        "video_title": cm["video_title"],
-                        "channel_id": cm["channel_id"],
-                        "channel_name": cm["channel_name"],
-                        "video_publish_date": cm.get("video_publish_date"),
-                        "author": cm["author"],
-                        "author_channel_id": cm.get("author_channel_id"),
-                        "text": cm["text"],
-                        "like_count": cm["like_count"],
-                        "published_at": cm["published_at"],
-                        "updated_at": cm["updated_at"],
-                    }},
-                    upsert=True,
-                )
-            )
+        for cm in unique.values():
+            # Rows are already shaped like the stored documents, so they are used as
+            # the $set payload directly instead of being copied field by field.
+            batch.append(UpdateOne({"comment_id": cm["comment_id"]}, {"$set": cm}, upsert=True))
 
             if len(batch) >= 1000:
                 flush(batch)
@@ -233,6 +239,24 @@ class DatabaseConnection:
             "Bulk result – upserted:%d matched:%d modified:%d",
             total_upserted, total_matched, total_modified
         )
+        return succeeded
+
+    def store_comments(self, comments: list, progress: dict):
+        """
+        Inserts a batch of comments, then saves the page tokens reached with them.
+
+        The tokens are only saved if every comment was written, so a failed batch is
+        fetched again on the next run instead of being skipped.
+
+        Args:
+            comments (list): A list of comment dictionaries to insert or update.
+            progress (dict): The page tokens covering the comments by key. Use None to
+                indicate "all caught up."
+        """
+        if comments and not self.insert_comments(comments):
+            self.logger.warning("Not saving progress for %d key(s) after a failed insert", len(progress))
+            return
+        self.save_progress_many(progress)
 
     def get_progress(self, key: str):
         """
@@ -267,6 +291,22 @@ class DatabaseConnection:
             self.logger.error("progress_exists failed: %s", exc)
             return False
 
+    def get_completed_keys(self) -> set:
+        """
+        Retrieves the keys of all progress documents marked "all caught up".
+
+        Returns:
+            set: The keys whose stored page token is None, or an empty set if an error occurs.
+        """
+        try:
+            return {
+                row["_id"]
+                for row in self.progress_collection.find({"last_page_token": None}, {"_id": 1})
+            }
+        except errors.PyMongoError as exc:
+            self.logger.error("get_completed_keys failed: %s", exc)
+            return set()
+
     def save_progress(self, key: str, page_token):
         """
         Saves or updates a progress document with the specified key and page token.
@@ -287,14 +327,82 @@ class DatabaseConnection:
         except errors.PyMongoError as exc:
             self.logger.error("save_progress failed: %s", exc)
 
+    def save_progress_many(self, progress: dict):
+        """
+        Saves or updates several progress documents in a single bulk write.
+
+        Args:
+            progress (dict): The page tokens to save by key. Use None to indicate "all caught up."
+        """
+        if not progress:
+            return
+        now = datetime.now(timezone.utc)
+        try:
+            self.progress_collection.bulk_write(
+                [
+                    UpdateOne(
+                        {"_id": key},
+                        {"$set": {"last_page_token": token, "timestamp": now}},
+                        upsert=True,
+                    )
+                    for key, token in progress.items()
+                ],
+                ordered=False,
+            )
+        except errors.PyMongoError as exc:
+            self.logger.error("save_progress_many failed: %s", exc)
+
+    def submit_write(self, func, *args):
+        """
+        Queues a write to run on the background writer thread.
+
+        Writes run one at a time in submission order, so a progress update submitted
+        after an insert is never applied before it. Blocks while WRITE_QUEUE_SIZE writes
+        are already waiting, which bounds the memory held by pending batches.
+
+        Args:
+            func (Callable): The write to run, e.g. `insert_comments`.
+            *args: The arguments to pass to `func`.
+        """
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._drain_writes, name="db-writer", daemon=True)
+                self._writer.start()
+        self._write_queue.put((func, args))
+
+    def _drain_writes(self):
+        """
+        Runs queued writes until the stop sentinel is received.
+        """
+        while True:
+            item = self._write_queue.get()
+            if item is None:
+                return
+            func, args = item
+            try:
+                func(*args)
+            except Exception as exc:
+                self.logger.error("Background write %s failed: %s", getattr(func, "__name__", func), exc)
+
+    def wait_for_writes(self):
+        """
+        Blocks until every queued write has run and stops the background writer.
+        """
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._write_queue.put(None)
+            writer.join()
+
     def close_connection(self):
         """
-        Closes the MongoDB connection.
+        Waits for queued writes and closes the MongoDB connection.
 
         Logs:
             Information about the connection closure or errors during the process.
         """
         if self.client:
+            self.wait_for_writes()
             try:
                 self.client.close()
                 self.logger.info("Mongo connection closed.")
@@ -58,7 +58,9 @@ def main() -> None:
         # Initialize the YouTube processor and channel filter
         processor = YouTubeProcessor(
             youtube_client, metadata_manager, comment_manager,
-            channel_manager, playlist_manager
+            channel_manager, playlist_manager,
+            max_workers=args.workers, channel_workers=args.channel_workers,
+            insert_batch_size=args.batch_size, force_refresh=args.force_refresh,
         )
         channel_filter = ChannelFilter(channel_manager)
 
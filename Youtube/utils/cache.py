@@ -1,31 +1,41 @@
 # File: Youtube/utils/cache.py
 
 import atexit
-import json
 import os
-from collections import OrderedDict
-from datetime import datetime
+import sqlite3
+import threading
+from typing import Callable, Optional
 
+import orjson
 
-class LRUCache(OrderedDict):
+from utils.timestamps import parse_timestamp
+
+
+class LRUCache(dict):
     """
-    Implements a Least Recently Used (LRU) cache using an Ordered Dictionary.
+    Implements a Least Recently Used (LRU) cache on top of a plain dictionary.
 
-    This class extends `OrderedDict` to provide an LRU caching mechanism, where
-    the least recently used items are removed when the cache exceeds its maximum size.
+    This class extends `dict`, which preserves insertion order, to provide an LRU
+    caching mechanism, where the least recently used items are removed when the
+    cache exceeds its maximum size.
 
     Attributes:
         max_size (int): The maximum number of items the cache can hold.
+        on_set (Optional[Callable]): Called with the key and value of every item added.
     """
 
-    def __init__(self, max_size: int):
+    def __init__(self, max_size: int, on_set: Optional[Callable] = None):
         """
         Initializes the LRUCache with a maximum size.
 
         Args:
             max_size (int): The maximum number of items the cache can hold.
+            on_set (Optional[Callable]): Called with the key and value of every item
+                added. Defaults to None.
         """
         self.max_size = max_size
+        self.on_set = on_set
+        self._lock = threading.Lock()
         super().__init__()
 
     def __setitem__(self, key, value):
@@ -36,9 +46,77 @@ class LRUCache(OrderedDict):
             key: The key of the item to add.
             value: The value of the item to add.
         """
-        if len(self) >= self.max_size:
-            self.popitem(last=False)
-        super().__setitem__(key, value)
+        self.load(key, value)
+        if self.on_set is not None:
+            self.on_set(key, value)
+
+    def load(self, key, value):
+        """
+        Adds an item to the cache without calling `on_set`, e.g. one read back from storage.
+
+        Args:
+            key: The key of the item to add.
+            value: The value of the item to add.
+        """
+        # Re-inserting an existing key moves it to the most recently used end.
+        with self._lock:
+            if key in self:
+                super().__delitem__(key)
+            elif len(self) >= self.max_size:
+                del self[next(iter(self))]
+            super().__setitem__(key, value)
+
+    def __getitem__(self, key):
+        """
+        Returns an item from the cache and marks it as the most recently used.
+
+        Args:
+            key: The key of the item to return.
+
+        Returns:
+            The cached value.
+
+        Raises:
+            KeyError: If the key is not in the cache.
+        """
+        with self._lock:
+            value = super().pop(key)
+            super().__setitem__(key, value)
+            return value
+
+    def get(self, key, default=None):
+        """
+        Returns an item from the cache, marking it as the most recently used, or a default.
+
+        Args:
+            key: The key of the item to return.
+            default: The value to return if the key is not in the cache. Defaults to None.
+
+        Returns:
+            The cached value, or `default` if the key is not in the cache.
+        """
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def update(self, *args, **kwargs):
+        """
+        Adds several items to the cache, applying the size limit to each.
+
+        Args:
+            *args: A mapping or iterable of key/value pairs, as accepted by `dict.update`.
+            **kwargs: Additional items to add.
+        """
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+
+# Number of pending cache writes that triggers a flush to SQLite.
+CACHE_FLUSH_SIZE = 100
+
+# Maximum number of keys bound in a single SQLite IN (...) lookup.
+SQLITE_MAX_VARIABLES = 900
 
 
 class CacheManager:
@@ -47,7 +125,9 @@ class CacheManager:
 
     This class provides methods to load, save, and manage cached data for YouTube video
     metadata, channel metadata, and etags. It uses `LRUCache` for efficient caching and
-    persists cache data to JSON files.
+    persists every new entry to a SQLite database, so writes are proportional to the
+    new entries and a killed process loses at most CACHE_FLUSH_SIZE of them. Entries
+    evicted from memory are read back from SQLite on demand (see `load_videos`).
     """
 
     def __init__(self, max_cache_size: int = 1000, cache_dir: str = "Youtube/yt_cache"):
@@ -60,58 +140,168 @@ class CacheManager:
         """
         self.max_cache_size = max_cache_size
         self.cache_dir = cache_dir
+        self.db_file = os.path.join(cache_dir, "metadata_cache.sqlite3")
         self.video_cache_file = os.path.join(cache_dir, "video_metadata_cache.json")
         self.etag_cache_file = os.path.join(cache_dir, "etag_cache.json")
-        self.channel_cache = {}
-        self.video_cache: LRUCache = LRUCache(max_cache_size)
-        self.etag_cache: LRUCache = LRUCache(max_cache_size)
+        self.channel_cache_file = os.path.join(cache_dir, "channel_metadata_cache.json")
+
+        self._pending = {"video_meta": {}, "channel_meta": {}, "etag_meta": {}}
+        self._db_lock = threading.Lock()
+
+        self.channel_cache: LRUCache = LRUCache(
+            max_cache_size, on_set=lambda k, v: self._queue_write("channel_meta", k, v)
+        )
+        self.video_cache: LRUCache = LRUCache(
+            max_cache_size, on_set=lambda k, v: self._queue_write("video_meta", k, v)
+        )
+        self.etag_cache: LRUCache = LRUCache(
+            max_cache_size, on_set=lambda k, v: self._queue_write("etag_meta", k, v)
+        )
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS video_meta (
+                video_id TEXT PRIMARY KEY, title TEXT, channel_name TEXT,
+                published_at TEXT, channel_id TEXT
+            );
+            CREATE TABLE IF NOT EXISTS channel_meta (channel_id TEXT PRIMARY KEY, name TEXT);
+            CREATE TABLE IF NOT EXISTS etag_meta (key TEXT PRIMARY KEY, value TEXT);
+            """
+        )
 
         self._load_caches()
-        atexit.register(self._save_caches)
+        self._migrate_json_caches()
+        atexit.register(self.flush)
 
-    def _load_caches(self) -> None:
+    def _queue_write(self, table: str, key, value) -> None:
         """
-        Loads existing cache data from files into memory.
+        Queues a cache entry for writing to SQLite and flushes once enough are pending.
 
-        This method reads cache files for video metadata and etags, and updates the
-        respective caches with the loaded data.
+        Args:
+            table (str): The table the entry belongs to.
+            key: The key of the cache entry.
+            value: The value of the cache entry.
         """
-        if os.path.exists(self.video_cache_file):
-            with open(self.video_cache_file, "r") as f:
-                self.video_cache.update(json.load(f))
-        if os.path.exists(self.etag_cache_file):
-            with open(self.etag_cache_file, "r") as f:
-                self.etag_cache.update(json.load(f))
+        with self._db_lock:
+            self._pending[table][key] = value
+            if sum(len(rows) for rows in self._pending.values()) >= CACHE_FLUSH_SIZE:
+                self._flush_locked()
 
-    def _save_caches(self) -> None:
+    def flush(self) -> None:
+        """
+        Writes all pending cache entries to SQLite in one transaction.
         """
-        Saves cache data to JSON files.
+        with self._db_lock:
+            self._flush_locked()
 
-        This method serializes the current state of the video metadata and etag caches
-        to JSON files. It ensures that datetime objects are properly serialized.
+    def _flush_locked(self) -> None:
         """
+        Writes all pending cache entries to SQLite. The caller must hold `_db_lock`.
+        """
+        videos, channels, etags = (self._pending[t] for t in ("video_meta", "channel_meta", "etag_meta"))
+        if not (videos or channels or etags):
+            return
 
-        def _ser(obj):
-            """
-            Custom serializer for JSON serialization.
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO video_meta VALUES (?, ?, ?, ?, ?)",
+                [
+                    (vid, title, owner_name, publish_dt.isoformat() if publish_dt else None, owner_id)
+                    for vid, (title, owner_name, publish_dt, owner_id) in videos.items()
+                ],
+            )
+            self._conn.executemany("INSERT OR REPLACE INTO channel_meta VALUES (?, ?)", channels.items())
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO etag_meta VALUES (?, ?)",
+                [(key, orjson.dumps(value).decode()) for key, value in etags.items()],
+            )
+        for rows in self._pending.values():
+            rows.clear()
+
+    def load_videos(self, video_ids) -> None:
+        """
+        Reloads evicted video entries from SQLite into the in-memory cache.
 
-            Args:
-                obj: The object to serialize.
+        Only the newest `max_cache_size` entries are kept in memory, so this is called
+        before deciding which videos have to be fetched from the API.
 
-            Returns:
-                str: The ISO format string for datetime objects.
+        Args:
+            video_ids: The IDs of the videos about to be looked up.
+        """
+        wanted = [vid for vid in dict.fromkeys(video_ids) if vid not in self.video_cache]
+        if not wanted:
+            return
 
-            Raises:
-                TypeError: If the object type is not supported for serialization.
-            """
-            if isinstance(obj, datetime):
-                return obj.isoformat()
-            raise TypeError(f"Cannot JSON-serialise {type(obj)}")
+        with self._db_lock:
+            pending = self._pending["video_meta"]
+            found = {vid: pending[vid] for vid in wanted if vid in pending}
+            rest = [vid for vid in wanted if vid not in found]
+            for start in range(0, len(rest), SQLITE_MAX_VARIABLES):
+                chunk = rest[start:start + SQLITE_MAX_VARIABLES]
+                for vid, title, owner_name, publish_dt, owner_id in self._conn.execute(
+                        "SELECT video_id, title, channel_name, published_at, channel_id "
+                        f"FROM video_meta WHERE video_id IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                ):
+                    found[vid] = (title, owner_name, parse_timestamp(publish_dt) if publish_dt else None, owner_id)
+
+        for vid, entry in found.items():
+            self.video_cache.load(vid, entry)
+
+    def _load_caches(self) -> None:
+        """
+        Warms the in-memory caches with the most recently written SQLite entries.
+
+        Rows are loaded oldest first so the newest entries end up most recently used.
+        The queries never return more than `max_cache_size` rows, so each cache is
+        filled with a single `dict.update`, bypassing the eviction check and the
+        write-back hook of `LRUCache.__setitem__`.
+        """
+        limit = self.max_cache_size
+        dict.update(self.channel_cache, reversed(self._conn.execute(
+            "SELECT channel_id, name FROM channel_meta ORDER BY rowid DESC LIMIT ?", (limit,)
+        ).fetchall()))
+        dict.update(self.video_cache, (
+            (vid, (title, owner_name, parse_timestamp(publish_dt) if publish_dt else None, owner_id))
+            for vid, title, owner_name, publish_dt, owner_id in reversed(self._conn.execute(
+                "SELECT video_id, title, channel_name, published_at, channel_id "
+                "FROM video_meta ORDER BY rowid DESC LIMIT ?", (limit,)
+            ).fetchall())
+        ))
+        dict.update(self.etag_cache, (
+            (key, orjson.loads(value))
+            for key, value in reversed(self._conn.execute(
+                "SELECT key, value FROM etag_meta ORDER BY rowid DESC LIMIT ?", (limit,)
+            ).fetchall())
+        ))
 
-        os.makedirs(os.path.dirname(self.video_cache_file), exist_ok=True)
-        with open(self.video_cache_file, "w") as vf:
-            json.dump(dict(self.video_cache), vf, default=_ser)
+    def _migrate_json_caches(self) -> None:
+        """
+        Imports cache files written by earlier versions into SQLite.
 
-        os.makedirs(os.path.dirname(self.etag_cache_file), exist_ok=True)
-        with open(self.etag_cache_file, "w") as ef:
-            json.dump(dict(self.etag_cache), ef, default=_ser)
\ No newline at end of file
+        Each imported JSON file is renamed with a ``.migrated`` suffix so it is only
+        read once.
+        """
+        if os.path.exists(self.channel_cache_file):
+            with open(self.channel_cache_file, "rb") as f:
+                self.channel_cache.update(orjson.loads(f.read()))
+            os.replace(self.channel_cache_file, self.channel_cache_file + ".migrated")
+        if os.path.exists(self.video_cache_file):
+            with open(self.video_cache_file, "rb") as f:
+                for video_id, (title, owner_name, publish_dt, owner_id) in orjson.loads(f.read()).items():
+                    self.video_cache[video_id] = (
+                        title,
+                        owner_name,
+                        parse_timestamp(publish_dt) if publish_dt else None,
+                        owner_id,
+                    )
+            os.replace(self.video_cache_file, self.video_cache_file + ".migrated")
+        if os.path.exists(self.etag_cache_file):
+            with open(self.etag_cache_file, "rb") as f:
+                self.etag_cache.update(orjson.loads(f.read()))
+            os.replace(self.etag_cache_file, self.etag_cache_file + ".migrated")
+        self.flush()
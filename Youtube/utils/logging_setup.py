@@ -1,11 +1,12 @@
 # File: utils/logging_setup.py
 
-import json
 import logging
 import logging.config
 import pathlib
 from typing import Optional
 
+import orjson
+
 from config import LOG_CONFIG_PATH
 
 
@@ -28,8 +29,8 @@ def setup_logging(config_path: Optional[str] = None) -> None:
     pathlib.Path("logs").mkdir(parents=True, exist_ok=True)
 
     # Load the logging configuration from the specified file
-    with open(config_path, "rt", encoding="utf-8") as fp:
-        cfg = json.load(fp)
+    with open(config_path, "rb") as fp:
+        cfg = orjson.loads(fp.read())
 
     # Create directories for handler filenames if specified in the configuration
     for handler in cfg.get("handlers", {}).values():
@@ -0,0 +1,50 @@
+# File: Youtube/utils/rate_limiter.py
+
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket used to pace outgoing API requests.
+
+    Tokens are replenished continuously at `rate` per second up to `capacity`.
+    Each request consumes one token and waits when the bucket is empty, so
+    short idle periods allow a bounded burst but never an unbounded one.
+
+    Attributes:
+        rate (float): The number of tokens added per second.
+        capacity (float): The maximum number of tokens the bucket can hold.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Initializes the TokenBucket as full.
+
+        Args:
+            rate (float): The number of tokens added per second.
+            capacity (float): The maximum number of tokens the bucket can hold.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> None:
+        """
+        Consumes tokens from the bucket, sleeping until enough are available.
+
+        Args:
+            tokens (float): The number of tokens to consume. Defaults to 1.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+                self._last_refill = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
@@ -0,0 +1,38 @@
+# File: Youtube/utils/timestamps.py
+
+from datetime import datetime
+from typing import Optional
+
+
+def parse_timestamp(value: str) -> datetime:
+    """
+    Parses an RFC 3339 timestamp as returned by the YouTube Data API.
+
+    YouTube timestamps (e.g. "2024-05-01T12:34:56Z") are handled by the C-level
+    `datetime.fromisoformat`; anything it rejects falls back to `dateutil`, which is
+    only imported when first needed.
+
+    Args:
+        value (str): The timestamp string to parse.
+
+    Returns:
+        datetime: The parsed, timezone-aware datetime.
+    """
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        from dateutil.parser import parse
+        return parse(value)
+
+
+def epoch_seconds(value: Optional[str]) -> Optional[int]:
+    """
+    Converts a YouTube timestamp to whole Unix epoch seconds.
+
+    Args:
+        value (Optional[str]): The timestamp string to convert.
+
+    Returns:
+        Optional[int]: The epoch seconds, or None if `value` is empty.
+    """
+    return int(parse_timestamp(value).timestamp()) if value else None